@@ -0,0 +1,63 @@
+"""
+    asyncio API to load mdt files without blocking the event loop.
+
+    The reading and the decoding are done in an executor (the default executor of the loop, or the
+    one given, use a bounded ThreadPoolExecutor to control the number of threads), the event loop
+    only waits for the results :
+
+        async for frame in aiter_frames(path):
+            ...
+
+        mdt_files = await load_many_async(paths, limit=16)
+"""
+import asyncio
+
+from MDTfile import MDTFile
+
+
+async def aiter_frames(file, executor=None):
+    """
+        Asynchronous iterator on the frames of a mdt file (a path or a binary file object).
+        Each frame is read and decoded in the executor, one frame at a time.
+    """
+    loop = asyncio.get_running_loop()
+    frames = MDTFile().iter_frames(file)
+    done = object()
+    reading = None
+
+    try:
+        while True:
+            # shielded : a cancellation does not stop the thread, the frame being read is waited below
+            reading = loop.run_in_executor(executor, next, frames, done)
+            frame = await asyncio.shield(reading)
+            reading = None
+            if frame is done:
+                break
+            yield frame
+    finally:
+        # close the file even if the iteration is stopped before the end (cancelled for example),
+        # the generator cannot be closed while a frame is being read
+        if reading is not None:
+            await asyncio.wait([reading])
+        await loop.run_in_executor(executor, frames.close)
+
+
+async def load_mdt_file_async(file, executor=None):
+    """load a mdt file in the executor and return the MDTFile"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, MDTFile, file)
+
+
+async def load_many_async(files, limit=8, executor=None, return_exceptions=False):
+    """
+        Load several mdt files concurrently, with at most limit files loaded at the same time.
+        return the list of the MDTFile in the same order than files (or the exceptions if
+        return_exceptions is True, like asyncio.gather)
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(file):
+        async with semaphore:
+            return await load_mdt_file_async(file, executor)
+
+    return await asyncio.gather(*[load(file) for file in files], return_exceptions=return_exceptions)
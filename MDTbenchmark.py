@@ -0,0 +1,193 @@
+"""
+    Benchmarks of the mdt reader on synthetic files (see MDTsynthetic).
+
+    For each file, four benchmarks are run :
+     - headers       : parse the file header and all the frame / MDA headers with the reader, without
+                       the data (MDTFile.index_mdt_file and MDTFile.read_frame(num, read_data=False))
+     - full_decode   : load the whole file (MDTFile(path))
+     - frame_access  : stream the frames one by one (MDTFile.iter_frames), the time of each frame is
+                       recorded
+     - random_access : index the file, then read each frame on demand in a random order (fixed seed)
+                       with MDTFile.read_frame and the file kept open, the time of each frame is recorded
+
+    Each benchmark is timed several times (best and median time, throughput in MB/s and frames/s),
+    then run once more under tracemalloc to get the peak memory. The results are printed (or saved)
+    in json so they can be compared over time.
+
+    Usage :
+        python MDTbenchmark.py [--shape 512 512] [--frames 4] [--repeat 3] [--output results.json]
+        python MDTbenchmark.py --files a.mdt b.mdt
+"""
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from MDTdeclaration import MDADataType
+from MDTfile import MDTFile
+from MDTsynthetic import generate_mdt_file
+from MDTvalidate import validate
+
+
+def _headers(path):
+    mdt_file = MDTFile()
+    mdt_file.index_mdt_file(path)
+    for num in range(mdt_file.nb_frame + 1):
+        mdt_file.read_frame(num, read_data=False)
+
+
+def _full_decode(path):
+    MDTFile(path)
+
+
+def _frame_access(path, frame_times=None):
+    start = time.perf_counter()
+    for _ in MDTFile().iter_frames(path):
+        now = time.perf_counter()
+        if frame_times is not None:
+            frame_times.append(now - start)
+        start = now
+
+
+def _random_access(path, frame_times=None):
+    # without the cache, else the frames would be decoded only once over the repeats
+    with MDTFile(keep_open=True) as mdt_file:
+        mdt_file.cache = None
+        mdt_file.index_mdt_file(path)
+
+        order = list(range(mdt_file.nb_frame + 1))
+        random.Random(0).shuffle(order)
+        for num in order:
+            start = time.perf_counter()
+            mdt_file.read_frame(num)
+            if frame_times is not None:
+                frame_times.append(time.perf_counter() - start)
+
+
+BENCHMARKS = [
+    ("headers", _headers),
+    ("full_decode", _full_decode),
+    ("frame_access", _frame_access),
+    ("random_access", _random_access),
+]
+
+
+def benchmark_file(path, repeat=3, scenario=""):
+    """run all the benchmarks on the file at path, return a list of results (dictionaries)"""
+    file_size = os.path.getsize(path)
+    nb_frames = validate(path)['nb_frame']
+
+    results = []
+    for name, function in BENCHMARKS:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(path)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            function(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        best = min(times)
+        result = {
+            'scenario'          : scenario,
+            'file'              : path,
+            'file_size'         : file_size,
+            'nb_frames'         : nb_frames,
+            'benchmark'         : name,
+            'repeat'            : repeat,
+            'best_s'            : best,
+            'median_s'          : statistics.median(times),
+            'mb_per_s'          : file_size / 1024**2 / best if best > 0 else None,
+            'frames_per_s'      : nb_frames / best if best > 0 else None,
+            'peak_memory_bytes' : peak,
+        }
+
+        if name in ("frame_access", "random_access"):
+            frame_times = []
+            function(path, frame_times)
+            result['frame_times_s'] = frame_times
+
+        results.append(result)
+
+    return results
+
+
+def run_benchmarks(scenarios, repeat=3, directory=None):
+    """
+        generate the synthetic files described by scenarios (a dictionary name -> keywords arguments
+        of generate_mdt_file) in directory (a temporary directory by default) and benchmark them.
+        return the full report (a dictionary)
+    """
+    report = {
+        'timestamp' : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python'    : platform.python_version(),
+        'numpy'     : np.__version__,
+        'platform'  : platform.platform(),
+        'results'   : [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = directory or tmp_dir
+        for name, kwargs in scenarios.items():
+            path = os.path.join(directory, "%s.mdt" % name)
+            generate_mdt_file(path, **kwargs)
+            report['results'].extend(benchmark_file(path, repeat, name))
+
+    return report
+
+
+DEFAULT_SCENARIOS = {
+    # one 2D frame per MDADataType, curves and text
+    "all_types": dict(shape=(256, 256)),
+    # many small frames
+    "many_frames": dict(nb_2d_frames=200, shape=(32, 32), nb_curve_frames=50, curve_length=256),
+    # a few bigger frames
+    "large_frames": dict(nb_2d_frames=4, shape=(512, 512), nb_curve_frames=0,
+                         data_types=[MDADataType.MDA_DATA_INT16, MDADataType.MDA_DATA_FLOAT32]),
+}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the mdt reader on synthetic files.")
+    parser.add_argument("--files", nargs="+", help="benchmark these files instead of synthetic ones")
+    parser.add_argument("--shape", nargs=2, type=int, help="shape of the 2D frames of a custom scenario")
+    parser.add_argument("--frames", type=int, default=4, help="number of 2D frames of the custom scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs (default 3)")
+    parser.add_argument("--directory", help="where to write the synthetic files (temporary by default)")
+    parser.add_argument("--output", help="json file for the results (stdout by default)")
+    args = parser.parse_args()
+
+    # the warnings on the unsupported data types would be measured too
+    logging.getLogger().setLevel(logging.ERROR)
+
+    if args.files:
+        report = run_benchmarks({}, args.repeat)
+        for path in args.files:
+            report['results'].extend(benchmark_file(path, args.repeat, "file"))
+    elif args.shape:
+        report = run_benchmarks({"custom": dict(nb_2d_frames=args.frames, shape=tuple(args.shape))},
+                                args.repeat, args.directory)
+    else:
+        report = run_benchmarks(DEFAULT_SCENARIOS, args.repeat, args.directory)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
@@ -0,0 +1,132 @@
+"""
+    Process-wide cache of the decoded data of the frames (MDTFrame.data).
+
+    The arrays are stored with a least recently used (LRU) eviction under a budget in bytes.
+    The key is (file identity, frame index, decode options), the file identity is built from
+    the path (or the device/inode), the size and the modification time of the file, so a
+    modified file is never served from the cache.
+
+    The cache is disabled by default (max_bytes = 0), to use it :
+
+        import MDTcache
+        MDTcache.default_cache.set_max_bytes(512 * 1024**2)
+
+    Warning : the cached arrays are shared by all the MDTFile that load the same frame, so they
+    are read-only. Copy them before modifying them.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+class FrameCache(object):
+    """a LRU cache of numpy arrays with a maximum size in bytes"""
+
+    def __init__(self, max_bytes=0):
+        self.max_bytes = int(max_bytes)
+
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @property
+    def nbytes(self):
+        """the size in bytes of all the cached arrays"""
+        return self._nbytes
+
+    def get(self, key):
+        """return the array stored for key (and mark it as recently used) or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """
+            store the array data (made read-only) for key, and evict the least recently used arrays
+            to stay in the budget. An array bigger than the budget is not stored.
+        """
+        if data.nbytes > self.max_bytes:
+            return
+
+        data.flags.writeable = False
+
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key).nbytes
+
+            self._entries[key] = data
+            self._nbytes += data.nbytes
+            self._evict()
+
+    def set_max_bytes(self, max_bytes):
+        """change the budget (0 disable the cache), evict what is needed"""
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self):
+        """remove all the arrays, the statistics are kept"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        """return a dictionary with the statistics of the cache"""
+        with self._lock:
+            return {
+                'hits'      : self.hits,
+                'misses'    : self.misses,
+                'evictions' : self.evictions,
+                'entries'   : len(self._entries),
+                'nbytes'    : self._nbytes,
+                'max_bytes' : self.max_bytes,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _evict(self):
+        """remove the least recently used arrays until the cache is in the budget (lock held)"""
+        while self._entries and self._nbytes > self.max_bytes:
+            _, data = self._entries.popitem(last=False)
+            self._nbytes -= data.nbytes
+            self.evictions += 1
+
+
+def file_identity(file):
+    """
+        return a hashable identity of file (a path or a file object), or None if the file
+        cannot be identified (a BytesIO for example), in this case it is not cached.
+    """
+    try:
+        if isinstance(file, str):
+            stat = os.stat(file)
+            return os.path.realpath(file), stat.st_size, stat.st_mtime_ns
+
+        stat = os.fstat(file.fileno())
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    except (AttributeError, OSError, ValueError):
+        # io.UnsupportedOperation is an OSError and a ValueError
+        return None
+
+
+# the cache used by default by all the MDTFile
+default_cache = FrameCache()
@@ -171,3 +171,23 @@ class ByteSize(IntEnum):
     AXIS_SCALES_SIZE      = 30
     SCAN_VARS_MIN_SIZE    = 77
     SPECTRO_VARS_MIN_SIZE = 38
+
+# the 4 first bytes of all the mdt files we have seen
+MDT_MAGIC = b'\x01\xb0\x93\xff'
+
+# size in bytes of one value for each MDADataType
+MDA_DATA_TYPE_SIZE = {
+    MDADataType.MDA_DATA_INT8     : 1,
+    MDADataType.MDA_DATA_UINT8    : 1,
+    MDADataType.MDA_DATA_INT16    : 2,
+    MDADataType.MDA_DATA_UINT16   : 2,
+    MDADataType.MDA_DATA_INT32    : 4,
+    MDADataType.MDA_DATA_UINT32   : 4,
+    MDADataType.MDA_DATA_INT64    : 8,
+    MDADataType.MDA_DATA_UINT64   : 8,
+    MDADataType.MDA_DATA_FLOAT32  : 4,
+    MDADataType.MDA_DATA_FLOAT48  : 6,
+    MDADataType.MDA_DATA_FLOAT64  : 8,
+    MDADataType.MDA_DATA_FLOAT80  : 10,
+    MDADataType.MDA_DATA_FLOATFIX : 8,
+}
@@ -0,0 +1,275 @@
+"""
+    Export of mdt files to chunked and compressed on-disk arrays.
+
+    The frames are streamed from the reader (MDTFile.iter_frames) and written one after the other,
+    so only one frame is kept in memory at a time.
+
+    Two backends are available :
+     - "hdf5" : one HDF5 file per mdt file, one group per frame (needs h5py)
+     - "npy"  : one directory per mdt file, one sub-directory per frame with the data cut in
+                compressed numpy chunks (.npz) and the header in a json file. Only needs numpy.
+
+    If the backend is not given, "hdf5" is used when h5py is installed, "npy" otherwise.
+"""
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from MDTfile import MDTFile
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# number of rows of the data array written in one chunk
+DEFAULT_CHUNK_ROWS = 256
+
+
+def default_backend():
+    """return the backend used when none is given : "hdf5" if h5py is installed, "npy" otherwise"""
+    return "hdf5" if h5py is not None else "npy"
+
+
+def export_mdt_file(src, dst, backend=None, chunk_rows=DEFAULT_CHUNK_ROWS, compression=True):
+    """
+        Convert the mdt file src (a path or a binary file object) to dst.
+
+        dst is the path of the HDF5 file for the "hdf5" backend and the path of the directory
+        for the "npy" backend. The file header is stored as attributes of the root, the frame
+        header (with the calibrations) as attributes of each frame.
+
+        If the conversion fails, the partial output is removed and the exception is raised.
+
+        return dst
+    """
+    if backend is None:
+        backend = default_backend()
+
+    if backend == "hdf5":
+        if h5py is None:
+            raise ImportError("h5py is needed for the hdf5 backend")
+        writer = _HDF5Writer(dst, chunk_rows, compression)
+    elif backend == "npy":
+        writer = _NpyDirWriter(dst, chunk_rows, compression)
+    else:
+        raise ValueError("Unknown export backend : %s" % backend)
+
+    mdt_file = MDTFile()
+    # the frames are not kept, and they would evict the entries of the shared cache
+    mdt_file.cache = None
+    completed = False
+    try:
+        for num, frame in enumerate(mdt_file.iter_frames(src)):
+            if num == 0:
+                # the header is read before the first frame
+                writer.write_file_attributes(_file_attributes(mdt_file, src))
+            writer.write_frame(num, frame)
+        completed = True
+    finally:
+        writer.close()
+        if not completed:
+            writer.remove()
+
+    return dst
+
+
+def export_many(sources, out_dir, backend=None, processes=None, **kwargs):
+    """
+        Convert several mdt files in parallel (one process per file), the outputs are named after
+        the source files and put in out_dir. When several sources have the same name (a/x.mdt and
+        b/x.mdt), a number is added to the next ones (x.h5, x_1.h5, ...).
+
+        processes is the maximum number of worker processes (the number of CPU by default),
+        the other keywords arguments are passed to export_mdt_file.
+
+        return the list of the output paths in the same order than sources
+    """
+    if backend is None:
+        backend = default_backend()
+
+    extension = ".h5" if backend == "hdf5" else ""
+    os.makedirs(out_dir, exist_ok=True)
+
+    destinations = []
+    used = set()
+    for src in sources:
+        name = os.path.splitext(os.path.basename(src))[0]
+        unique_name, i = name, 0
+        # lower case, for the case-insensitive file systems
+        while unique_name.lower() in used:
+            i += 1
+            unique_name = "%s_%d" % (name, i)
+        used.add(unique_name.lower())
+        destinations.append(os.path.join(out_dir, unique_name + extension))
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(export_mdt_file, src, dst, backend, **kwargs)
+                   for src, dst in zip(sources, destinations)]
+        return [future.result() for future in futures]
+
+
+def read_npy_frame(frame_dir):
+    """
+        Read back a frame exported with the "npy" backend.
+
+        return a tuple (attributes, data), data is a numpy array, a string for the
+        text frames or None if the frame had no data.
+    """
+    with open(os.path.join(frame_dir, "attrs.json"), "r", encoding="utf-8") as f:
+        attributes = json.load(f)
+
+    layout = attributes.pop("_layout")
+
+    if layout["kind"] == "text":
+        return attributes, attributes.pop("text")
+    if layout["kind"] == "none":
+        return attributes, None
+
+    data = np.empty(layout["shape"], dtype=layout["dtype"])
+    for i, (start, stop) in enumerate(_chunk_bounds(layout["shape"][0], layout["chunk_rows"])):
+        path = os.path.join(frame_dir, layout["chunk_name"] % i)
+        if path.endswith(".npz"):
+            with np.load(path) as chunk:
+                data[start:stop] = chunk["data"]
+        else:
+            data[start:stop] = np.load(path)
+
+    return attributes, data
+
+
+def _file_attributes(mdt_file, src):
+    """the attributes of the root : file header and source"""
+    return {
+        'source'        : src if isinstance(src, str) else getattr(src, "name", ""),
+        'nb_frame'      : mdt_file.nb_frame,
+        'mdt_file_size' : mdt_file._mdt_file_size,
+    }
+
+
+def _chunk_bounds(rows, chunk_rows):
+    """yield the (start, stop) of each chunk along the first axis"""
+    chunk_rows = max(1, int(chunk_rows))
+    for start in range(0, rows, chunk_rows):
+        yield start, min(start + chunk_rows, rows)
+
+
+def _frame_kind(frame):
+    """"array", "text" or "none" depending on what is in frame.data"""
+    if isinstance(frame.data, np.ndarray):
+        return "array"
+    if isinstance(frame.data, str):
+        return "text"
+    return "none"
+
+
+class _HDF5Writer(object):
+    """write the frames in one HDF5 file, the calibrations are stored as json strings"""
+
+    def __init__(self, path, chunk_rows, compression):
+        self._path = path
+        self._h5 = h5py.File(path, "w")
+        self._chunk_rows = chunk_rows
+        self._compression = "gzip" if compression else None
+
+    def write_file_attributes(self, attributes):
+        self._h5.attrs.update(attributes)
+
+    def write_frame(self, num, frame):
+        group = self._h5.create_group("frame_%04d" % num)
+
+        for key, value in frame.get_header_dict().items():
+            if value is None:
+                continue
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            group.attrs[key] = value
+
+        group.attrs["metadata"] = frame.metadata
+
+        kind = _frame_kind(frame)
+        if kind == "array" and frame.data.size:
+            chunks = (min(self._chunk_rows, frame.data.shape[0]),) + frame.data.shape[1:]
+            dataset = group.create_dataset("data", shape=frame.data.shape, dtype=frame.data.dtype,
+                                           chunks=chunks, compression=self._compression)
+            for start, stop in _chunk_bounds(frame.data.shape[0], self._chunk_rows):
+                dataset[start:stop] = frame.data[start:stop]
+        elif kind == "text":
+            group.attrs["text"] = frame.data
+
+    def close(self):
+        self._h5.close()
+
+    def remove(self):
+        """delete the file written (after close)"""
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+
+class _NpyDirWriter(object):
+    """write the frames in a directory tree, see read_npy_frame to read them back"""
+
+    def __init__(self, path, chunk_rows, compression):
+        self._created = not os.path.exists(path)
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._written = []     # what was written in a directory that already existed
+        self._chunk_rows = chunk_rows
+        self._compression = compression
+
+    def write_file_attributes(self, attributes):
+        self._written.append(os.path.join(self._path, "attrs.json"))
+        with open(self._written[-1], "w", encoding="utf-8") as f:
+            json.dump(attributes, f, indent=1)
+
+    def write_frame(self, num, frame):
+        frame_dir = os.path.join(self._path, "frame_%04d" % num)
+        self._written.append(frame_dir)
+        os.makedirs(frame_dir, exist_ok=True)
+
+        attributes = frame.get_header_dict()
+        attributes["metadata"] = frame.metadata
+
+        kind = _frame_kind(frame)
+        if kind == "array" and frame.data.size == 0:
+            kind = "none"
+        layout = {"kind": kind}
+
+        if kind == "array":
+            layout["shape"] = list(frame.data.shape)
+            layout["dtype"] = frame.data.dtype.str
+            layout["chunk_rows"] = self._chunk_rows
+            layout["chunk_name"] = "data_%05d.npz" if self._compression else "data_%05d.npy"
+
+            for i, (start, stop) in enumerate(_chunk_bounds(frame.data.shape[0], self._chunk_rows)):
+                path = os.path.join(frame_dir, layout["chunk_name"] % i)
+                if self._compression:
+                    np.savez_compressed(path, data=frame.data[start:stop])
+                else:
+                    np.save(path, frame.data[start:stop])
+
+        elif kind == "text":
+            attributes["text"] = frame.data
+
+        attributes["_layout"] = layout
+
+        with open(os.path.join(frame_dir, "attrs.json"), "w", encoding="utf-8") as f:
+            json.dump(attributes, f, indent=1)
+
+    def close(self):
+        pass
+
+    def remove(self):
+        """delete the directory, or only what was written in it if it already existed"""
+        if self._created:
+            shutil.rmtree(self._path, ignore_errors=True)
+            return
+
+        for path in self._written:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
@@ -1,14 +1,26 @@
 import binascii
 import io
+import itertools
+import os
+from contextlib import contextmanager
 from struct import *
 
+import time
+
 import numpy as np
 import logging
 
 from MDTdeclaration import *
+from MDTcache import default_cache, file_identity
+from MDTpool import default_pool
+from MDTstats import CountingFile, MDTFrameStats
+from MDTwriter import MDTWriter
+
+# the messages are formatted only when their level is enabled, the configuration is left to the application
+logger = logging.getLogger(__name__)
 
-# activate the logging system at the lower level
-logging.basicConfig(level=logging.INFO, format="%(asctime)s -- %(levelname)s -- %(message)s")
+# unique keys of the MDTFile in the file pool
+_pool_keys = itertools.count()
 
 
 class MDTFile(list):
@@ -96,21 +108,50 @@ class MDTFile(list):
         def __getattr__(self, attr):
             return getattr(self._file, attr)
 
-    def __init__(self, mdt_file = None):
+    def __init__(self, mdt_file = None, keep_open = False, pool = None):
         """
             initialise the object, and if mdt_file is a path to a mde file or a opened file object,
             will read it and extract the data.
 
             if mdt_file is an open file object, it has to be open in binary mode.
+
+            if keep_open is True, the file stays open after the loading to read the frames on demand
+            (see read_frame), until close() or the end of a with block. The files given by path are
+            kept in pool (a MDTFilePool, the process-wide MDTpool.default_pool by default) that limits
+            the number of open files and reopens them when needed. Loading another file releases the
+            previous one.
         """
 
         super().__init__()
 
+        self.keep_open = keep_open
+        self.pool = pool if pool is not None else default_pool
+        self._pool_key = next(_pool_keys)
+        self._source = None         # the path or the file object read
+        self._closed = False        # close() was called, read_frame is not possible anymore
+        self._frame_offsets = []    # position of each frame in the file
+
         self.nb_frame = 0
 
         self._mdt_file_size    = 0
         self._file             = self.__MDTBufferedReaderDecorator(None)
 
+        # function (shape, dtype) -> numpy array used to allocate the data of the frames,
+        # None to use np.empty. It allows to decode directly in another memory (see MDTshared)
+        self.data_allocator    = None
+
+        # cache of the decoded data shared by all the MDTFile (see MDTcache), None to disable it
+        self.cache             = default_cache
+        self._file_id          = None
+        self._frame_num        = 0
+
+        # a MDTStats to record measures on each frame read (see MDTstats), None to disable it
+        self.stats             = None
+        self._data_start_time  = None
+
+        # False to read only the headers of the MDA frames (see read_frame)
+        self._read_data        = True
+
         if mdt_file:
             self.load_mdt_file(mdt_file)
 
@@ -119,25 +160,218 @@ class MDTFile(list):
             Load a mdt file and populate the frame list
             file can be a file object or a path (string) to the file
         """
-        try:
-            if isinstance(file, str):
-                self._file = self.__MDTBufferedReaderDecorator(open(file, mode='rb'))
-            else:
-                self._file = self.__MDTBufferedReaderDecorator(file)
+        for frame in self.iter_frames(file):
+            self.append(frame)
+
+    def iter_frames(self, file):
+        """
+            Read a mdt file and yield the frames one by one, without storing them in the frame list.
+            Only the frame being read is kept in memory, so it can be used to convert big files.
+            file can be a file object or a path (string) to the file
+        """
+        with self._open_file(file) as raw_file:
+            if self.stats is not None:
+                raw_file = CountingFile(raw_file)
+            self._file = self.__MDTBufferedReaderDecorator(raw_file)
+
+            self._file_id = file_identity(file)
 
             self._read_header()
+            self._frame_offsets = []
 
             for frm in range(self.nb_frame + 1):
 
-                logging.info("Reading frame %d" % frm)
+                logger.info("Reading frame %d", frm)
+                if self.stats is not None:
+                    bytes_before, seeks_before = raw_file.bytes_read, raw_file.seek_count
+
+                start_time = time.perf_counter()
                 frame = self._read_frame(frm)
-                self.append(frame)
+                end_time = time.perf_counter()
 
                 # to be sure we reposition the pointer where it should be after reading the frame
                 self._file.seek(frame.frm_ptr_start + frame.frm_byte_size)
+                self._frame_offsets.append(frame.frm_ptr_start)
+
+                if self.stats is not None:
+                    self._record_frame_stats(frm, frame, start_time, end_time,
+                                             raw_file.bytes_read - bytes_before,
+                                             raw_file.seek_count - seeks_before)
+
+                yield frame
+
+    def index_mdt_file(self, file):
+        """
+            Read only the file header and the position of each frame (nothing is decoded), the frames
+            can then be read on demand with read_frame().
+            file can be a file object or a path (string) to the file
+        """
+        with self._open_file(file) as raw_file:
+            self._file = self.__MDTBufferedReaderDecorator(raw_file)
+            self._file_id = file_identity(file)
+
+            self._read_header()
+
+            # each frame starts with its size, we jump from one to the other
+            self._frame_offsets = []
+            position = self._file.tell()
+            for frm in range(self.nb_frame + 1):
+                self._file.seek(position)
+                self._frame_offsets.append(position)
+                position += self._file.read_uint32()
+
+    def read_frame(self, num, read_data=True):
+        """
+            Read the frame num of the file loaded (or indexed) and return it, without reading the other
+            frames and without adding it to the list. With keep_open the file is not reopened (except if
+            it was closed by the pool), else it is reopened from its path.
+            With read_data False, only the headers of a MDA frame are read (with the calibrations), its
+            data stay None.
+            After close() it raises ValueError, until another file is loaded or indexed.
+        """
+        if self._source is None:
+            raise ValueError("No mdt file loaded or indexed")
+        if self._closed:
+            raise ValueError("The mdt file is closed")
+
+        with self._open_file(self._source) as raw_file:
+            self._file = self.__MDTBufferedReaderDecorator(raw_file)
+            self._file.seek(self._frame_offsets[num])
+            self._read_data = read_data
+            try:
+                return self._read_frame(num)
+            finally:
+                self._read_data = True
+
+    def close(self):
+        """
+            release the file kept open (keep_open), the frames already loaded stay available but
+            read_frame cannot be used anymore
+        """
+        self._closed = True
+        if self.keep_open and self._source is not None:
+            if isinstance(self._source, str):
+                self.pool.discard(self._pool_key)
+            else:
+                self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextmanager
+    def _open_file(self, file):
+        """
+            the binary file object to read file (a path or a file object). Without keep_open it is closed
+            at the end of the with block, else it is kept (in the pool for a path)
+        """
+        if self.keep_open and isinstance(self._source, str) and file != self._source:
+            # the previous file is not needed anymore
+            self.pool.discard(self._pool_key)
+
+        self._source = file
+        self._closed = False
 
-        finally:
-            self._file.close()
+        if self.keep_open and isinstance(file, str):
+            with self.pool.handle(self._pool_key, file) as raw_file:
+                yield raw_file
+
+        elif self.keep_open:
+            yield file
+
+        else:
+            if not isinstance(file, str) and file.closed:
+                raise ValueError("The file object is closed, use keep_open to read the frames on demand")
+
+            raw_file = open(file, mode='rb') if isinstance(file, str) else file
+            try:
+                yield raw_file
+            finally:
+                raw_file.close()
+
+    def save(self, file, data_type=None):
+        """
+            Write all the frames in a mdt file, file can be a path or a binary file object (see MDTwriter).
+            Only the text frames and the MDA frames with 2D data or a curve can be written, in the data type
+            of their calibration or in data_type if given (a MDADataType, for all the MDA frames).
+            ValueError is raised if the values do not fit in an integer type, processed data (leveled
+            frames for example) can be saved with data_type=MDADataType.MDA_DATA_FLOAT32 (or FLOAT64),
+            see MDTWriter.write_frame.
+            If a frame cannot be written, the file is deleted (file given by path) or left without
+            a valid header (file object), and the exception is raised.
+        """
+        try:
+            with MDTWriter(file) as writer:
+                for frame in self:
+                    writer.write_frame(frame, data_type)
+        except BaseException:
+            # do not leave a truncated file
+            if isinstance(file, str) and os.path.exists(file):
+                os.remove(file)
+            raise
+
+    def to_arrow(self):
+        """
+            return two pyarrow.Table : the header fields of the frames (one row per frame) and
+            the samples of the curve frames in long format (frame, x, y), see MDTtable
+        """
+        from MDTtable import frames_to_arrow, curves_to_arrow
+        return frames_to_arrow(self), curves_to_arrow(self)
+
+    def to_pandas(self):
+        """
+            return two pandas.DataFrame : the header fields of the frames (one row per frame) and
+            the samples of the curve frames in long format (frame, x, y), see MDTtable
+        """
+        from MDTtable import frames_to_pandas, curves_to_pandas
+        return frames_to_pandas(self), curves_to_pandas(self)
+
+    def _allocate_data(self, shape, dtype=float):
+        """allocate the array where the data of a frame will be decoded"""
+        if self.data_allocator is None:
+            return np.empty(shape, dtype=dtype)
+        return self.data_allocator(shape, dtype)
+
+    def _record_frame_stats(self, num, frame, start_time, end_time, bytes_read, seek_count):
+        """give the measures of a frame to self.stats"""
+        data_start_time = self._data_start_time if self._data_start_time is not None else end_time
+
+        self.stats.record(MDTFrameStats(
+            index       = num,
+            frame_type  = frame.type,
+            data_type   = frame.mesurands[-1]['data_type'] if frame.mesurands else None,
+            bytes_read  = bytes_read,
+            seek_count  = seek_count,
+            header_time = data_start_time - start_time,
+            decode_time = end_time - data_start_time,
+        ))
+
+    def _cache_key(self):
+        """
+            the key of the current frame in the cache : (file identity, frame index, decode options)
+            or None if the data should not be cached
+        """
+        if (self.cache is None or not self.cache.enabled
+                or self._file_id is None or self.data_allocator is not None):
+            return None
+
+        # there is no decode option yet, the data are always decoded in float64
+        return self._file_id, self._frame_num, ()
+
+    def _get_cached_data(self):
+        """return the cached data of the current frame or None"""
+        key = self._cache_key()
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def _put_cached_data(self, data):
+        """store the data of the current frame in the cache (the array becomes read-only)"""
+        key = self._cache_key()
+        if key is not None:
+            self.cache.put(key, data)
 
     def _read_header(self):
         """ Read the header of the mdt file"""
@@ -164,36 +398,39 @@ class MDTFile(list):
     def _read_frame(self, num = 0):
 
         frame = MDTFrame()
+        self._frame_num = num
+        self._data_start_time = None
         self._extract_header(frame)
 
         if frame.type == MDTFrameType.MDT_FRAME_SCANNED:
-            logging.warning("Frame #%d: Frame STM not implemented yet." % num)
+            logger.warning("Frame #%d: Frame STM not implemented yet.", num)
 
         elif (frame.type == MDTFrameType.MDT_FRAME_SPECTROSCOPY or
                       frame.type == MDTFrameType.MDT_FRAME_CURVES):
-            logging.warning("Frame #%d: MDT_FRAME_SPECTROSCOPY and MDT_FRAME_CURVES not implemented yet." % num)
+            logger.warning("Frame #%d: MDT_FRAME_SPECTROSCOPY and MDT_FRAME_CURVES not implemented yet.", num)
 
         elif frame.type == MDTFrameType.MDT_FRAME_TEXT:
-            logging.info("Frame %d is a text frame"%num)
+            logger.info("Frame %d is a text frame", num)
+            self._data_start_time = time.perf_counter()
             self._extract_text_frame(frame)
-            logging.info("--> Frame %s loaded"%frame.title)
+            logger.info("--> Frame %s loaded", frame.title)
 
         elif frame.type == MDTFrameType.MDT_FRAME_OLD_MDA:
-            logging.warning("Frame #%d: Old MDA frame not supported" % num)
+            logger.warning("Frame #%d: Old MDA frame not supported", num)
 
         elif frame.type == MDTFrameType.MDT_FRAME_MDA:
-            logging.info("Frame %d is a MDA frame" % num)
+            logger.info("Frame %d is a MDA frame", num)
             self._extract_mda_frame(frame)
-            logging.info("--> Frame %s loaded" % frame.title)
+            logger.info("--> Frame %s loaded", frame.title)
 
         elif frame.type == MDTFrameType.MDT_FRAME_CURVES_NEW:
-            logging.warning("Frame #%d: MDT_FRAME_CURVES_NEW not supported." % num)
+            logger.warning("Frame #%d: MDT_FRAME_CURVES_NEW not supported.", num)
 
         elif frame.type == MDTFrameType.MDT_FRAME_PALETTE:
-            logging.warning("Frame #%d: Frame palette data not supported." % num)
+            logger.warning("Frame #%d: Frame palette data not supported.", num)
 
         else:
-            logging.warning("Frame #%d: unknown frame type." % num)
+            logger.warning("Frame #%d: unknown frame type.", num)
 
         return frame
 
@@ -240,10 +477,11 @@ class MDTFile(list):
         and the XML metadata part.
 
         In the text part
-         - 2 byte for the text length
-                Note : apparently if the text frame has more than 65535 characters, Nova-PX can write it
-                in this case the length is at least on 3 bytes, but it cannot reopen it...
-         - 16 0x00 bytes
+         - 4 byte for the text length
+                Note : the length was read on 2 bytes followed by 16 0x00 bytes, but if the text frame
+                has more than 65535 characters, Nova-PX writes the length on more bytes, so we read it
+                as an unsigned int on 4 bytes (the same value for the shorter texts)
+         - 14 0x00 bytes
          - the text encoded on 1 byte (at least for latin characters)
          - 1 byte the length of the title then 3 0x00,
                 if  the title is the default one 'Text Frame' this byte is not there
@@ -258,53 +496,60 @@ class MDTFile(list):
          - the XML text : the characters are utf-16 packed by 2 bytes
 
         After that, there are some non-zero bytes, but I don't know what there are for.
+
+        The whole frame is read at once, and the text and the XML are only decoded when
+        frame.data and frame.metadata are used for the first time (see _LazyText).
         """
         size = frame.frm_byte_size - ByteSize.FRAME_HEADER_SIZE
 
         if size < 1:
             raise Exception("the frame frm_byte_size is smaller than the frame header frm_byte_size")
 
-        data_len = self._file.read_uint16() # unpack('<H', self._file.read(2))[0]  # int(data_buffer[pos])
+        buffer = memoryview(self._file.read(size))
+
+        if len(buffer) < size:
+            raise Exception("the frame is truncated, %d bytes read instead of %d" % (len(buffer), size))
+
+        if size < 4:
+            raise Exception("the frame frm_byte_size is smaller than the text length")
+
+        data_len = unpack_from('<I', buffer, 0)[0]
 
         if size < 18 + data_len + 4:  # +4 for the title length bytes and the 3 zeros
             raise Exception("the frame frm_byte_size is smaller than the data frm_byte_size")
 
-        # we jump the 16 0x00 bytes
-        self._file.shift_stream_position(16)
-
-        # the main text
-        frame.data = self._file.read(data_len).decode('utf-8')
+        # the main text, after the length and the 14 0x00 bytes
+        frame.data = _LazyText(buffer[18:18 + data_len], 'utf-8')
+        position = 18 + data_len
 
         # is there a title to this frame
-        title_len = self._file.read_uchar()
-        title_trail = unpack('<3B', self._file.read(3)) #TODO : do something nicer with the function peak()
+        title_len = buffer[position]
+        title_trail = buffer[position + 1:position + 4]
+        position += 4
 
         # the default title and not an empty title.
-        if title_len == 0 and sum(title_trail) != 0:
+        if title_len == 0 and any(title_trail):
             title_len = 11
-        elif title_trail == 0:  # the title is empty
-            self._file.shift_stream_position(-1)
 
-        if size < 18 + data_len + 4 + title_len:
+        if size < position + title_len:
             raise Exception("the frame frm_byte_size is smaller than the data frm_byte_size + title frm_byte_size")
 
         # the title of the frame
-        frame.title = self._file.read(title_len).decode('utf-8')
+        frame.title = str(buffer[position:position + title_len], 'utf-8')
+        position += title_len
 
-        if size < 18 + data_len + 4 + title_len + 2:
+        if size < position + 2:
             raise Exception("the frame frm_byte_size is smaller than the data frm_byte_size + title frm_byte_size + XML header")
 
-        # we unpack the length of the metadata on 2 bytes (unit16)
-        xml_len = self._file.read_uint16()
+        # the length of the metadata on 2 bytes (unit16), then 2 0x00 byte
+        xml_len = unpack_from('<H', buffer, position)[0]
+        position += 4
 
-        if size < 18 + data_len + 4 + title_len + 2 + xml_len:
+        if size < position + xml_len:
             raise Exception("the frame frm_byte_size is smaller than the data frm_byte_size + title frm_byte_size + XML data")
 
-        # we jump the 2 0x00 byte
-        self._file.shift_stream_position(2)
-
         # the characters are packed on 2 bytes (it's UTF-16)
-        frame.metadata = self._file.read(xml_len).decode('utf-16')
+        frame.metadata = _LazyText(buffer[position:position + xml_len], 'utf-16')
 
     def _extract_mda_calibration(self):
         """read the information on the different axis (x,y,z) and store the in an dictionary
@@ -362,11 +607,10 @@ class MDTFile(list):
         calibration['comment'] = extract_string(comment_len)
         calibration['unit'] = extract_string(unit_len)
         calibration['author'] = extract_string(author_len)
-        calibration['comment'] = extract_string(comment_len)
 
         self._file.seek(starting_position + total_len)
 
-        logging.info("Calibration: " + str(calibration))
+        logger.info("Calibration: %s", calibration)
         return calibration
 
     def _extract_mda_2d_data(self, frame):
@@ -376,7 +620,7 @@ class MDTFile(list):
         z_axis = frame.mesurands[0]
 
         if y_axis['unit'] != x_axis['unit'] :
-            logging.warning("Frame %s : Error : the unit for X and Y are not the same !" % frame.title)
+            logger.warning("Frame %s : Error : the unit for X and Y are not the same !", frame.title)
 
         frame.dimensions_unit = x_axis['unit']
         frame.mesurands_unit  = z_axis['unit']
@@ -396,8 +640,14 @@ class MDTFile(list):
         zscale = z_axis['scale']
         zoffset =  z_axis['bias']
 
+        data = self._get_cached_data()
+        if data is not None:
+            frame.data = data
+            return
+
         total = frame.xn * frame.yn
-        data = np.empty(total)
+        data = self._allocate_data((frame.xn, frame.yn))
+        flat_data = data.reshape(total) # a view, the values are written directly in data
 
         try:
             file_fct_read = {
@@ -415,13 +665,15 @@ class MDTFile(list):
 
 
             for i in range(total):
-                data[i] = zoffset + zscale*file_fct_read()
+                flat_data[i] = zoffset + zscale*file_fct_read()
+
+            self._put_cached_data(data)
 
         except KeyError as e:
-            logging.warning(e)
-            logging.warning('The data format in the frame %s is not supported' % frame.title)
+            logger.warning(e)
+            logger.warning('The data format in the frame %s is not supported', frame.title)
 
-        frame.data = np.reshape(data, (frame.xn, frame.yn))
+        frame.data = data
 
     def _extract_mda_curve(self, frame): # previously extract_mda_spectrum
         """extract the data for mda curve (also called spectrum)
@@ -454,7 +706,7 @@ class MDTFile(list):
         #    /* If res == 0, fallback to arraysize */
         if data_len == 0:
             data_len = frame.data_size
-            logging.warning("The old type of MDA curve (with the x axis stocked" +
+            logger.warning("The old type of MDA curve (with the x axis stocked" +
                             " in the xml metadata are not supported.")
 
 
@@ -502,9 +754,21 @@ class MDTFile(list):
             # (nb_mesurands == 1 and the x is not in the data field) but it is not in the XML-metadata par either.
             # So we have to regenerate the x from the other metadata (from dimensions)
 
-            if frame.nb_dimensions >0: # we test if it is old type like
-                y = np.empty(data_len, dtype=float)
+            data = self._get_cached_data()
+            if data is not None:
+                if frame.nb_dimensions > 0:
+                    frame.yreal = data[1].max() - data[1].min()
+                    if x_axis["comment"] == "":
+                        frame.xreal = frame.xn * x_scale
+                frame.data = data
+                return
+
+            # x and y are written directly in the two rows of the data array (no copy at the end)
+            data = self._allocate_data((2, data_len))
+            x = data[0]
+            y = data[1]
 
+            if frame.nb_dimensions >0: # we test if it is old type like
 
                 for n in range(data_len):
                     y[n] = y_scale*file_fct_read_y_var()
@@ -512,32 +776,30 @@ class MDTFile(list):
                 frame.yreal = y.max() - y.min()
 
                 if x_axis["comment"] == "" : #No XML-metadata stuff
-                    x = np.empty(data_len, dtype=float)
                     frame.xreal = frame.xn * x_scale
                     for n in range(data_len):
                         x[n] = x_axis["bias"] + n*x_axis["scale"]
 
 
                 else :
-                    logging.warning("The old type of MDA curve (with the x axis stocked" +
+                    logger.warning("The old type of MDA curve (with the x axis stocked" +
                                 " in the xml metadata are not supported.")
-                    x= np.arange(data_len)
+                    x[:] = np.arange(data_len)
 
             else :
                 # In the new version the data structure is xyxyxyx...
                 # with x and y 2 different types of data.
-                x = np.empty(data_len, dtype=float)
-                y = np.empty(data_len, dtype=float)
                 for n in range(data_len):
                     x[n] = x_scale*file_fct_read_x_var()
                     y[n] = y_scale*file_fct_read_y_var()
 
 
-            frame.data = np.array([x, y])
+            self._put_cached_data(data)
+            frame.data = data
 
         except KeyError as e:
-            logging.debug(e)
-            logging.warning('The data type in the frame %s is not supported' % frame.title)
+            logger.debug(e)
+            logger.warning('The data type in the frame %s is not supported', frame.title)
 
     def _extract_scanned_data(self, frame):
         """extract the data generated by the STM like device"""
@@ -622,28 +884,49 @@ class MDTFile(list):
         #store the pointer to the data for this frame
         #frame._data_field = self._file.tell()
 
+        if not self._read_data:
+            return
+
+        self._data_start_time = time.perf_counter()
 
         # extraction of the 2D color map
         if frame.nb_dimensions == 2 and frame.nb_mesurands == 1:
-            logging.info("It's a 2D MDA frame")
+            logger.info("It's a 2D MDA frame")
             self._extract_mda_2d_data(frame)
 
         elif ((frame.nb_dimensions == 1 and frame.nb_mesurands == 1)
             or (frame.nb_dimensions == 0 and frame.nb_mesurands == 2)):
-            logging.info("It's a 1D MDA curve frame")
+            logger.info("It's a 1D MDA curve frame")
             self._extract_mda_curve(frame)
 
         elif frame.nb_dimensions == 3 and frame.nb_mesurands >= 1 :
-            logging.info("It's a 3D MDA 'brick' frame")
+            logger.info("It's a 3D MDA 'brick' frame")
             raise Exception(" MDA-Frame/brick data not supported yet.")
             # raman images */
             # if ((brick = extract_brick(mdaframe, i+1, &n, filename))) {
             #     gwy_container_transfer(brick, data, "/", "/", FALSE);
             pass
         else :
-            logging.warning(" frame %s : dim = %d mes = %d, not supported\n" %
-                      (frame.title, frame.nb_dimensions, frame.nb_mesurands))
+            logger.warning(" frame %s : dim = %d mes = %d, not supported",
+                           frame.title, frame.nb_dimensions, frame.nb_mesurands)
+
+
+
+class _LazyText(object):
+    """bytes (a memoryview on the frame buffer) decoded only when the text is needed"""
 
+    __slots__ = ('raw', 'encoding')
+
+    def __init__(self, raw, encoding):
+        self.raw = raw
+        self.encoding = encoding
+
+    def decode(self):
+        return str(self.raw, self.encoding)
+
+    def __reduce__(self):
+        # a memoryview cannot be pickled
+        return _LazyText, (bytes(self.raw), self.encoding)
 
 
 class MDTFrame:
@@ -692,25 +975,82 @@ class MDTFrame:
         self.xreal         = 0 # physical size of the data (scale*xn)
         self.yreal         = 0 # physical size of the data (scale*yn)
 
+    @property
+    def data(self):
+        """the data, for the text frames the text is decoded the first time it is used"""
+        if isinstance(self._data, _LazyText):
+            self._data = self._data.decode()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def metadata(self):
+        """the XML metadata, for the text frames it is decoded the first time it is used"""
+        if isinstance(self._metadata, _LazyText):
+            self._metadata = self._metadata.decode()
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value):
+        self._metadata = value
+
     def print_header(self):
         """
         Print all the info load from the frame header
         (for debug purpose).
         """
-        logging.debug("--------------------------------------")
-        logging.debug("Frame start at byte %d" % self.frm_ptr_start)
-        logging.debug("frame frm_byte_size: " + str(self.frm_byte_size) + " bytes")
-        logging.debug("Frame version: " + str(self.version))
-        logging.debug("Frame datetime: %d-%02d-%02d %02d:%02d:%02d" % \
-               (self.year, self.month, self.day, self.hour, self.min, self.sec))
-        logging.debug("Frame type : " + str(self.type) + " -- "+ str(MDTFrameType(self.type)))
-        logging.debug("--------------------------------------")
+        logger.debug("--------------------------------------")
+        logger.debug("Frame start at byte %d", self.frm_ptr_start)
+        logger.debug("frame frm_byte_size: %d bytes", self.frm_byte_size)
+        logger.debug("Frame version: %s", self.version)
+        logger.debug("Frame datetime: %d-%02d-%02d %02d:%02d:%02d",
+                     self.year, self.month, self.day, self.hour, self.min, self.sec)
+        logger.debug("Frame type : %s -- %s", self.type, MDTFrameType(self.type))
+        logger.debug("--------------------------------------")
+
+    def get_header_dict(self):
+        """
+        Return all the info load from the frame header (everything except data and metadata)
+        in a dictionary with only plain python types (int, float, str, list and dict),
+        so it can be serialized (json, HDF5 attributes, ...).
+        """
+        return {
+            'frm_byte_size'   : int(self.frm_byte_size),
+            'frm_ptr_start'   : int(self.frm_ptr_start),
+            'data_size'       : int(self.data_size),
+            'type'            : None if self.type is None else int(self.type),
+            'version'         : list(self.version),
+            'title'           : self.title,
+            'guids'           : list(self.guids) if isinstance(self.guids, list) else self.guids,
+            'year'            : self.year,
+            'month'           : self.month,
+            'day'             : self.day,
+            'hour'            : self.hour,
+            'min'             : self.min,
+            'sec'             : self.sec,
+            'nb_dimensions'   : self.nb_dimensions,
+            'dimensions'      : [dict(d) for d in self.dimensions],
+            'dimensions_unit' : self.dimensions_unit,
+            'nb_mesurands'    : self.nb_mesurands,
+            'mesurands'       : [dict(m) for m in self.mesurands],
+            'mesurands_unit'  : self.mesurands_unit,
+            'xn'              : int(self.xn),
+            'yn'              : int(self.yn),
+            'xbias'           : float(self.xbias),
+            'ybias'           : float(self.ybias),
+            'xreal'           : float(self.xreal),
+            'yreal'           : float(self.yreal),
+        }
 
 
 
 if __name__ == "__main__":
 
     import sys, os
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s -- %(levelname)s -- %(message)s")
     path = os.path.abspath(os.path.dirname(sys.argv[0]))
     print(path)
      
@@ -0,0 +1,105 @@
+"""
+    A bounded pool of open files, shared by the MDTFile that keep their file open.
+
+    Each owner (a MDTFile) has its own file object, the pool limits the total number of open files:
+    when the limit is reached the least recently used file is closed, and it is reopened the next
+    time its owner needs it. A file being used (inside pool.handle()) is never closed by the pool,
+    a file discarded while in use is closed at the end of its last handle().
+
+        with default_pool.handle(key, path) as f:
+            f.seek(offset)
+            ...
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class MDTFilePool(object):
+    """a LRU pool of at most max_open binary files open for reading"""
+
+    def __init__(self, max_open=64):
+        self.max_open = max_open
+
+        self._files = OrderedDict()   # key -> [file object, path, number of users, discarded]
+        self._lock = threading.Lock()
+
+        self.opens = 0
+        self.evictions = 0
+
+    @contextmanager
+    def handle(self, key, path):
+        """
+            the open file of key (opened or reopened on path if needed), in use until the end of the with.
+            If key is kept open on another path, this file is closed and path is opened instead.
+        """
+        entry = self._acquire(key, path)
+        try:
+            yield entry[0]
+        finally:
+            with self._lock:
+                entry[2] -= 1
+                if entry[3] and entry[2] == 0:
+                    entry[0].close()
+                self._evict()
+
+    def discard(self, key):
+        """close the file of key now, or at the end of its last handle() if it is in use"""
+        with self._lock:
+            entry = self._files.pop(key, None)
+            if entry is not None:
+                self._release(entry)
+
+    def close_all(self):
+        """close all the files not in use"""
+        with self._lock:
+            for key in [key for key, entry in self._files.items() if entry[2] == 0]:
+                self._files.pop(key)[0].close()
+
+    @property
+    def nb_open(self):
+        return len(self._files)
+
+    def _acquire(self, key, path):
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and entry[1] != path:
+                # the owner reads another file now
+                del self._files[key]
+                self._release(entry)
+                entry = None
+
+            if entry is None:
+                entry = [open(path, 'rb'), path, 0, False]
+                self._files[key] = entry
+                self.opens += 1
+            else:
+                self._files.move_to_end(key)
+
+            entry[2] += 1
+            self._evict()
+            return entry
+
+    @staticmethod
+    def _release(entry):
+        """close the file of an entry removed from the pool, or mark it to be closed after use (lock held)"""
+        if entry[2] == 0:
+            entry[0].close()
+        else:
+            entry[3] = True
+
+    def _evict(self):
+        """close the least recently used files not in use, until the limit (lock held)"""
+        if len(self._files) <= self.max_open:
+            return
+
+        for key in list(self._files):
+            if len(self._files) <= self.max_open:
+                break
+            if self._files[key][2] == 0:
+                self._files.pop(key)[0].close()
+                self.evictions += 1
+
+
+# the pool used by default by all the MDTFile
+default_pool = MDTFilePool()
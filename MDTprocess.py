@@ -0,0 +1,169 @@
+"""
+    Vectorized preprocessing of 2D frames (plane leveling, line flattening and roughness).
+
+    The 2D frames of the same shape, from one or several MDTFile, are gathered in a stack
+    (a numpy array of shape (nb_frames, xn, yn), float32 by default to save memory) and
+    each operation is done on the whole stack at once, in place (the median and the roughness
+    need temporary arrays, they are computed by blocks of frames of at most BLOCK_BYTES) :
+
+        stacks = stack_frames([mdt_file_1, mdt_file_2])
+        for shape, (stack, frames) in stacks.items():
+            slopes = level_planes(stack, frames)
+            flatten_lines(stack)
+            stats = roughness(stack)
+"""
+import numpy as np
+
+# size of the temporary arrays of flatten_lines and roughness (at least one frame)
+BLOCK_BYTES = 64 * 1024**2
+
+
+def is_2d_frame(frame):
+    """True if the frame is a 2D MDA frame with data (see MDTFile._extract_mda_2d_data)"""
+    return (frame.nb_dimensions == 2 and frame.nb_mesurands == 1
+            and isinstance(frame.data, np.ndarray) and frame.data.ndim == 2)
+
+
+def stack_frames(sources, dtype=np.float32):
+    """
+        Gather the 2D frames of sources (MDTFile, lists of MDTFrame or MDTFrame) by shape.
+
+        return a dictionary shape -> (stack, frames) where stack is a new array of shape
+        (len(frames), xn, yn) and of type dtype, and frames the list of the MDTFrame in the
+        same order than the stack.
+    """
+    by_shape = {}
+    for source in sources:
+        frames = [source] if hasattr(source, 'nb_dimensions') else source
+        for frame in frames:
+            if is_2d_frame(frame):
+                by_shape.setdefault(frame.data.shape, []).append(frame)
+
+    stacks = {}
+    for shape, frames in by_shape.items():
+        stack = np.empty((len(frames),) + shape, dtype=dtype)
+        for i, frame in enumerate(frames):
+            stack[i] = frame.data
+        stacks[shape] = (stack, frames)
+
+    return stacks
+
+
+def level_planes(stack, frames=None):
+    """
+        Subtract to each frame of the stack its least-squares plane (in place).
+
+        return an array (nb_frames, 3) with the offset and the slopes along x and y of each plane.
+        If the frames are given, the slopes are in physical units (z unit per x / y unit, from the
+        xreal and yreal of the frames), else in z unit per pixel.
+    """
+    nb_frames, xn, yn = stack.shape
+
+    # centered index coordinates : the grid is orthogonal, so the least-squares plane has a closed
+    # form, offset = mean(z), slope_x = sum(z*x) / (yn*sum(x^2)), slope_y = sum(z*y) / (xn*sum(y^2))
+    x = np.arange(xn, dtype=np.float64) - (xn - 1) / 2.0
+    y = np.arange(yn, dtype=np.float64) - (yn - 1) / 2.0
+    x_norm = yn * np.dot(x, x)
+    y_norm = xn * np.dot(y, y)
+
+    # the sums along the lines and the columns are small arrays (nb_frames, xn) and (nb_frames, yn)
+    coefficients = np.empty((nb_frames, 3))
+    coefficients[:, 0] = stack.mean(axis=(1, 2), dtype=np.float64)
+    coefficients[:, 1] = np.tensordot(stack.sum(axis=2, dtype=np.float64), x, axes=1) / x_norm if x_norm else 0.0
+    coefficients[:, 2] = np.tensordot(stack.sum(axis=1, dtype=np.float64), y, axes=1) / y_norm if y_norm else 0.0
+
+    # broadcast on small arrays, there is no temporary array of the size of the stack
+    fitted = coefficients.astype(stack.dtype)
+    stack -= fitted[:, 0, None, None]
+    stack -= fitted[:, 1, None, None] * x.astype(stack.dtype)[None, :, None]
+    stack -= fitted[:, 2, None, None] * y.astype(stack.dtype)[None, None, :]
+
+    if frames is not None:
+        steps = np.array([[_step(frm.xreal, xn), _step(frm.yreal, yn)] for frm in frames])
+        coefficients[:, 1:] /= steps
+
+    return coefficients
+
+
+def flatten_lines(stack, axis=-1):
+    """
+        Subtract to each line of each frame its median (in place). The lines are along axis
+        (the last axis by default, i.e. stack[n, i, :] is a line).
+
+        return the medians, shape (nb_frames, number of lines)
+    """
+    axis = axis % stack.ndim
+    if axis == 0:
+        raise ValueError("The lines cannot be along the frame axis")
+
+    # np.median copies its input, so the stack is done by blocks of frames
+    shape = list(stack.shape)
+    del shape[axis]
+    medians = np.empty(shape, dtype=stack.dtype)
+
+    for block in _blocks(stack):
+        block_medians = np.median(stack[block], axis=axis, keepdims=True)
+        stack[block] -= block_medians
+        medians[block] = np.squeeze(block_medians, axis=axis)
+
+    return medians
+
+
+def roughness(stack):
+    """
+        the roughness parameters of each frame of the stack, in a dictionary of arrays (nb_frames,) :
+            mean : the mean height
+            Sa   : arithmetical mean height (mean of |z - mean|)
+            Sq   : root mean square height
+            Sz   : maximum height (peak to valley)
+            Ssk  : skewness
+            Sku  : kurtosis
+    """
+    nb_frames = stack.shape[0]
+    flat = stack.reshape(nb_frames, -1)
+
+    # the moments are accumulated in float64 even for a float32 stack
+    mean = flat.mean(axis=1, dtype=np.float64)
+    sa = np.empty(nb_frames)
+    moments = np.empty((3, nb_frames))
+
+    # the deviations are computed by blocks of frames, with 2 temporary arrays of the size of a block
+    for block in _blocks(stack):
+        deviation = flat[block] - mean[block, None].astype(flat.dtype)
+        power = np.abs(deviation)
+        sa[block] = power.mean(axis=1, dtype=np.float64)
+
+        # deviation^2, ^3 and ^4 in the same array
+        np.multiply(deviation, deviation, out=power)
+        for moment in moments:
+            moment[block] = power.mean(axis=1, dtype=np.float64)
+            power *= deviation
+
+    sq = np.sqrt(moments[0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ssk = moments[1] / sq ** 3
+        sku = moments[2] / sq ** 4
+
+    return {
+        'mean' : mean,
+        'Sa'   : sa,
+        'Sq'   : sq,
+        'Sz'   : (flat.max(axis=1) - flat.min(axis=1)).astype(np.float64),
+        'Ssk'  : ssk,
+        'Sku'  : sku,
+    }
+
+
+def _blocks(stack):
+    """slices of the frames of the stack, each of at most BLOCK_BYTES (but at least one frame)"""
+    frame_bytes = max(1, stack[0].nbytes) if len(stack) else 1
+    step = max(1, BLOCK_BYTES // frame_bytes)
+    for start in range(0, len(stack), step):
+        yield slice(start, start + step)
+
+
+def _step(real_size, nb_points):
+    """physical size of a pixel (MDTFrame.xreal is scale * (xn - 1)), 1 if it cannot be computed"""
+    if nb_points > 1 and real_size:
+        return real_size / (nb_points - 1)
+    return 1.0
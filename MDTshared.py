@@ -0,0 +1,157 @@
+"""
+    Decoding of the frames in shared memory, to give them to other processes without copy.
+
+    load_shared() decodes the frames of a mdt file directly in multiprocessing.shared_memory blocks
+    (one block per frame) and returns a SharedFrames, a list of SharedFrameHandle. A handle is small
+    (name of the block, shape, dtype and the frame header) so it can be sent to a worker process,
+    where SharedFrameHandle.open() gives a numpy array on the shared block.
+
+    Lifetime : the SharedFrames owns the blocks, they exist until SharedFrames.close() is called
+    (or the end of the with block). The workers have to close their handles before that.
+
+    Needs python >= 3.8 (multiprocessing.shared_memory).
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from MDTfile import MDTFile
+
+
+class SharedFrameHandle(object):
+    """
+        a picklable reference on the data of a frame stored in a shared memory block
+
+        name   : name of the shared memory block (None if the frame has no array data)
+        shape  : shape of the data
+        dtype  : numpy dtype of the data (as a string)
+        header : the frame header (MDTFrame.get_header_dict()) with the metadata, and the text
+                 for the text frames
+    """
+
+    def __init__(self, name, shape, dtype, header):
+        self.name   = name
+        self.shape  = tuple(shape)
+        self.dtype  = dtype
+        self.header = header
+
+        self._shm = None
+
+    def open(self):
+        """attach the shared memory block and return the data as a numpy array (no copy)"""
+        if self.name is None:
+            return None
+
+        if self._shm is None:
+            self._shm = _attach(self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    def close(self):
+        """
+            detach the shared memory block (but do not destroy it). The arrays returned by open()
+            must not be used anymore.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        # the attached block is local to the process
+        state = self.__dict__.copy()
+        state['_shm'] = None
+        return state
+
+    def __repr__(self):
+        return "SharedFrameHandle(%r, %r, %r, title=%r)" % (self.name, self.shape, self.dtype,
+                                                            self.header.get('title', ''))
+
+
+class SharedFrames(list):
+    """the list of the handles of a mdt file, owner of the shared memory blocks"""
+
+    def __init__(self):
+        super().__init__()
+        self._blocks = []
+
+    def close(self):
+        """close and destroy (unlink) all the shared memory blocks"""
+        for handle in self:
+            handle.close()
+
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def _allocate(self, shape, dtype):
+        """MDTFile.data_allocator : a numpy array on a new shared memory block"""
+        dtype = np.dtype(dtype)
+        nb_bytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+
+        # a block cannot be empty
+        shm = shared_memory.SharedMemory(create=True, size=max(1, nb_bytes))
+        self._blocks.append(shm)
+
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __reduce__(self):
+        # only the handles are sent to the other processes, never the ownership of the blocks
+        return list, (list(self),)
+
+
+def load_shared(file):
+    """
+        Decode the mdt file (a path or a binary file object) in shared memory blocks.
+        return a SharedFrames with one SharedFrameHandle per frame.
+    """
+    shared = SharedFrames()
+
+    mdt_file = MDTFile()
+    mdt_file.data_allocator = shared._allocate
+
+    try:
+        for frame in mdt_file.iter_frames(file):
+            header = frame.get_header_dict()
+            header['metadata'] = frame.metadata
+
+            if isinstance(frame.data, np.ndarray):
+                # the array was allocated by shared._allocate, so it is on the last block
+                handle = SharedFrameHandle(shared._blocks[-1].name, frame.data.shape,
+                                           frame.data.dtype.str, header)
+            else:
+                if isinstance(frame.data, str):
+                    header['text'] = frame.data
+                handle = SharedFrameHandle(None, (), None, header)
+
+            shared.append(handle)
+
+            # the frame keeps a view on the block, it has to be released before any close()
+            frame.data = None
+            del frame
+
+    except BaseException:
+        shared.close()
+        raise
+
+    return shared
+
+
+def _attach(name):
+    """attach an existing block, without registering it to the resource tracker when possible"""
+    try:
+        # python >= 3.13, the creator is the only one in charge of the unlink
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
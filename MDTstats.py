@@ -0,0 +1,90 @@
+"""
+    Instrumentation of the mdt reader.
+
+    Set MDTFile.stats to a MDTStats before loading a file to record, for each frame, the number of
+    bytes read, the number of seeks, the time spent in the headers and in the decoding of the data,
+    the frame type and the data type :
+
+        mdt_file = MDTFile()
+        mdt_file.stats = MDTStats(callback=print)   # the callback is optional
+        mdt_file.load_mdt_file(path)
+        print(mdt_file.stats.summary())
+
+    When MDTFile.stats is None (the default) nothing is recorded and the reader is not slowed down.
+"""
+
+
+class MDTFrameStats(object):
+    """the measures of one frame"""
+
+    __slots__ = ('index', 'frame_type', 'data_type', 'bytes_read', 'seek_count',
+                 'header_time', 'decode_time')
+
+    def __init__(self, index, frame_type=None, data_type=None, bytes_read=0, seek_count=0,
+                 header_time=0.0, decode_time=0.0):
+        self.index       = index        # index of the frame in the file
+        self.frame_type  = frame_type   # MDTFrameType (as int)
+        self.data_type   = data_type    # MDADataType of the data (as int) for the MDA frames, else None
+        self.bytes_read  = bytes_read   # bytes read from the file for this frame
+        self.seek_count  = seek_count   # number of seek on the file for this frame
+        self.header_time = header_time  # seconds spent to read the headers (frame, MDA, calibrations)
+        self.decode_time = decode_time  # seconds spent to read and decode the data
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return "MDTFrameStats(%s)" % ", ".join("%s=%r" % item for item in self.to_dict().items())
+
+
+class MDTStats(object):
+    """
+        collect the MDTFrameStats of the frames read by a MDTFile.
+        callback, if given, is called with each MDTFrameStats as soon as the frame is read.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.frames = []
+
+    def record(self, frame_stats):
+        self.frames.append(frame_stats)
+        if self.callback is not None:
+            self.callback(frame_stats)
+
+    def clear(self):
+        self.frames = []
+
+    def summary(self):
+        """the totals over all the recorded frames, in a dictionary"""
+        return {
+            'nb_frames'   : len(self.frames),
+            'bytes_read'  : sum(frm.bytes_read for frm in self.frames),
+            'seek_count'  : sum(frm.seek_count for frm in self.frames),
+            'header_time' : sum(frm.header_time for frm in self.frames),
+            'decode_time' : sum(frm.decode_time for frm in self.frames),
+        }
+
+    def to_dicts(self):
+        return [frm.to_dict() for frm in self.frames]
+
+
+class CountingFile(object):
+    """wrap a binary file object and count the bytes read and the seeks"""
+
+    def __init__(self, file_):
+        self._file = file_
+        self.bytes_read = 0
+        self.seek_count = 0
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        self.seek_count += 1
+        return self._file.seek(offset, whence)
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
@@ -0,0 +1,113 @@
+"""
+    Generator of synthetic mdt files (for the benchmarks and the tests).
+
+    The files are written with MDTWriter : text frames, 2D MDA frames (2 dimensions, 1 mesurand)
+    with any MDADataType and MDA curve frames (old-like with 1 dimension and 1 mesurand, new-like
+    with 2 interleaved mesurands). The values are random (with a seed, so the files are reproducible).
+
+    The data of the 2D frames are generated and written by blocks, so files of several GB can be
+    generated with little memory. The frame size is coded on 32 bits, so a frame must be smaller
+    than 4 GB.
+"""
+import os
+
+import numpy as np
+
+from MDTdeclaration import *
+from MDTwriter import MDA_NUMPY_DTYPE, MDTWriter, make_calibration
+
+# bytes of the data of a 2D frame generated at once
+ROW_BLOCK_BYTES = 16 * 1024**2
+
+# a fixed date, so the files are reproducible
+SYNTHETIC_DATE = (2020, 1, 1, 12, 0, 0)
+
+
+def generate_mdt_file(path, nb_2d_frames=None, shape=(256, 256), data_types=None,
+                      nb_curve_frames=2, curve_length=1000, nb_text_frames=1, seed=0):
+    """
+        Write a synthetic mdt file at path.
+
+        nb_2d_frames    : number of 2D frames (by default one per data type)
+        shape           : (xn, yn) the number of points of the 2D frames
+        data_types      : the MDADataType of the 2D frames, used in turn (by default all of them)
+        nb_curve_frames : number of curve frames, alternatively old-like and new-like
+        curve_length    : number of points of the curves
+        nb_text_frames  : number of text frames
+        seed            : seed of the random values
+
+        return the size of the file in bytes
+    """
+    if data_types is None:
+        data_types = list(MDADataType)
+    if nb_2d_frames is None:
+        nb_2d_frames = len(data_types)
+
+    if nb_text_frames + nb_2d_frames + nb_curve_frames == 0:
+        raise ValueError("a mdt file needs at least one frame")
+
+    rng = np.random.RandomState(seed)
+
+    with MDTWriter(path) as writer:
+        for i in range(nb_text_frames):
+            writer.write_text_frame("synthetic text %d\n" % i * 10, "Text frame %d" % i,
+                                    '<?xml version="1.0"?><Synthetic/>', SYNTHETIC_DATE)
+
+        for i in range(nb_2d_frames):
+            _write_2d_frame(writer, "Image %d" % i, shape, data_types[i % len(data_types)], rng)
+
+        for i in range(nb_curve_frames):
+            _write_curve_frame(writer, "Curve %d" % i, curve_length, i % 2 == 1, rng)
+
+    return os.path.getsize(path)
+
+
+def _write_2d_frame(writer, title, shape, data_type, rng):
+    """a 2D frame with random values of the type data_type"""
+    data_type = MDADataType(data_type)
+    dimensions = [
+        make_calibration("X", "nm", MDADataType.MDA_DATA_FLOAT64, 0, shape[0] - 1, 1.0),
+        make_calibration("Y", "nm", MDADataType.MDA_DATA_FLOAT64, 0, shape[1] - 1, 1.0),
+    ]
+    mesurands = [make_calibration("Z", "nm", data_type, 0, 0, 0.01)]
+
+    writer.write_mda_frame(title, dimensions, mesurands,
+                           _random_blocks(shape[0] * shape[1], data_type, rng), date=SYNTHETIC_DATE)
+
+
+def _random_blocks(total, data_type, rng):
+    """yield the raw data by blocks, the types without numpy equivalent are zeros"""
+    dtype = MDA_NUMPY_DTYPE.get(data_type)
+    item_size = MDA_DATA_TYPE_SIZE[data_type]
+    block = max(1, ROW_BLOCK_BYTES // item_size)
+
+    for start in range(0, total, block):
+        count = min(block, total - start)
+        if dtype is None:
+            yield bytes(count * item_size)
+        elif dtype.kind == 'f':
+            yield rng.standard_normal(count).astype(dtype)
+        else:
+            yield np.frombuffer(rng.bytes(count * dtype.itemsize), dtype=dtype)
+
+
+def _write_curve_frame(writer, title, length, new_like, rng):
+    """
+        a curve, old-like (1 dimension, 1 mesurand, only the y in the data) or
+        new-like (2 mesurands, x and y interleaved in the data)
+    """
+    y = rng.standard_normal(length)
+
+    if new_like:
+        mesurands = [
+            make_calibration("X", "V", MDADataType.MDA_DATA_FLOAT64, 0, length, 1.0),
+            make_calibration("Y", "nA", MDADataType.MDA_DATA_FLOAT32, 0, length, 1.0),
+        ]
+        data = np.empty(length, dtype=[('x', '<f8'), ('y', '<f4')])
+        data['x'] = np.linspace(-1.0, 1.0, length)
+        data['y'] = y
+        writer.write_mda_frame(title, [], mesurands, data, date=SYNTHETIC_DATE)
+    else:
+        dimensions = [make_calibration("X", "V", MDADataType.MDA_DATA_FLOAT64, 0, length, 0.01, -1.0)]
+        mesurands = [make_calibration("Y", "nA", MDADataType.MDA_DATA_FLOAT32, 0, length, 1.0)]
+        writer.write_mda_frame(title, dimensions, mesurands, y.astype('<f4'), date=SYNTHETIC_DATE)
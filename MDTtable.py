@@ -0,0 +1,105 @@
+"""
+    Tabular export of the frames (Apache Arrow and pandas).
+
+     - the frame table : one row per frame with the header fields, the calibrations
+                         (dimensions and mesurands) are stored as json strings
+     - the curve table : the samples of all the curve frames in long format, the columns are
+                         frame (index of the frame in the file), x and y
+
+    The x and y columns of the arrow curve table are built directly on the numpy buffers of
+    the frames (one arrow chunk per frame), so no copy of the samples is done.
+    pyarrow and pandas are optional, they are only imported when needed.
+"""
+import json
+
+import numpy as np
+
+from MDTdeclaration import MDTFrameType
+
+
+def is_curve_frame(frame):
+    """True if the frame is a 1D MDA curve with data (see MDTFile._extract_mda_curve)"""
+    return (frame.type == MDTFrameType.MDT_FRAME_MDA
+            and isinstance(frame.data, np.ndarray)
+            and ((frame.nb_dimensions == 1 and frame.nb_mesurands == 1)
+                 or (frame.nb_dimensions == 0 and frame.nb_mesurands == 2)))
+
+
+def frame_records(frames):
+    """return a list with one dictionary (flat, only scalars) of header fields per frame"""
+    records = []
+    for num, frame in enumerate(frames):
+        record = {'frame': num}
+        for key, value in frame.get_header_dict().items():
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            record[key] = value
+        records.append(record)
+    return records
+
+
+def frames_to_arrow(frames):
+    """return a pyarrow.Table with the header fields of frames (one row per frame)"""
+    import pyarrow as pa
+    return pa.Table.from_pylist(frame_records(frames))
+
+
+def curves_to_arrow(frames):
+    """
+        return a pyarrow.Table with the samples of the curve frames in long format (frame, x, y).
+        Each frame gives one chunk of the table, x and y share the memory of frame.data.
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([('frame', pa.int32()), ('x', pa.float64()), ('y', pa.float64())])
+
+    batches = []
+    for num, frame in enumerate(frames):
+        if not is_curve_frame(frame):
+            continue
+
+        # rows of a C-contiguous array are contiguous, pa.array wraps them without copy
+        x, y = frame.data[0], frame.data[1]
+        batches.append(pa.RecordBatch.from_arrays(
+            [pa.array(np.full(len(x), num, dtype=np.int32)), pa.array(x), pa.array(y)],
+            schema=schema))
+
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def frames_to_pandas(frames):
+    """return a pandas.DataFrame with the header fields of frames (one row per frame)"""
+    import pandas as pd
+    return pd.DataFrame.from_records(frame_records(frames))
+
+
+def curves_to_pandas(frames):
+    """return a pandas.DataFrame with the samples of the curve frames in long format (frame, x, y)"""
+    import pandas as pd
+
+    curves = [(num, frame.data) for num, frame in enumerate(frames) if is_curve_frame(frame)]
+    if not curves:
+        return pd.DataFrame({'frame': np.empty(0, dtype=np.int32),
+                             'x': np.empty(0), 'y': np.empty(0)})
+
+    # the samples are copied once, directly in the final columns
+    return pd.DataFrame({
+        'frame': np.concatenate([np.full(data.shape[1], num, dtype=np.int32) for num, data in curves]),
+        'x'    : np.concatenate([data[0] for _, data in curves]),
+        'y'    : np.concatenate([data[1] for _, data in curves]),
+    }, copy=False)
+
+
+def write_table(table, path, format="parquet"):
+    """write a pyarrow.Table in a parquet file or in an arrow IPC file (format = "parquet" or "ipc")"""
+    import pyarrow as pa
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    elif format == "ipc":
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        raise ValueError("Unknown table format : %s" % format)
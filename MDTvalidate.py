@@ -0,0 +1,330 @@
+"""
+    Structural validation of mdt files, without decoding the data.
+
+    Only the headers are read (file header, frame headers, MDA headers and calibrations), the
+    data themselves are skipped with seek (only the text frames, usually small, are read to check
+    their title and XML lengths), so it is fast enough to triage a lot of files (truncated files
+    from interrupted acquisitions for example).
+
+    validate(path) return a report (a dictionary with only plain python types) :
+        path      : the path of the file
+        file_size : the real size of the file
+        nb_frame  : the number of frames announced by the header (last frame index + 1)
+        status    : "ok", "warning" or "error" (the worst of the file and of the frames)
+        errors    : list of the problems found on the file itself (messages starting by "warning: "
+                    are only warnings)
+        frames    : a report per frame found in the frame chain with the keys
+                    index, offset, size, type, status and errors
+
+    It can also be used from the command line :
+        python MDTvalidate.py [--jobs N] file_or_directory [...]
+    it prints one json report per line and return 1 if one of the files has an error.
+"""
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from MDTdeclaration import *
+
+# the real size of the file header, see MDTFile._read_header
+FILE_HEADER_REAL_SIZE = ByteSize.FILE_HEADER_SIZE + 1
+
+# MDA frame header, see MDTFile._extract_mda_frame
+MDA_HEADER_STRUCT = struct.Struct('<II32s4x6I4xI')
+
+# calibration header, see MDTFile._extract_mda_calibration
+CALIBRATION_STRUCT = struct.Struct('<IIIIIQd8xddQQiI36x')
+
+
+class _FrameError(Exception):
+    """a problem that prevent to check the rest of the frame"""
+    pass
+
+
+def validate(path):
+    """check the structure of the mdt file at path and return the report (see the module doc)"""
+    report = {
+        'path'      : path,
+        'file_size' : 0,
+        'nb_frame'  : 0,
+        'status'    : "ok",
+        'errors'    : [],
+        'frames'    : [],
+    }
+
+    try:
+        report['file_size'] = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            _validate_file(f, report)
+    except OSError as e:
+        report['errors'].append("cannot read the file: %s" % e)
+
+    statuses = [_status(report['errors'])] + [frm['status'] for frm in report['frames']]
+    for status in ("error", "warning"):
+        if status in statuses:
+            report['status'] = status
+            break
+
+    return report
+
+
+def validate_many(paths, jobs=None):
+    """validate several files in parallel (jobs processes), return the reports in the same order"""
+    if jobs == 1:
+        return [validate(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(validate, paths, chunksize=64))
+
+
+def _status(errors):
+    if any(not e.startswith("warning: ") for e in errors):
+        return "error"
+    if errors:
+        return "warning"
+    return "ok"
+
+
+def _read(f, fmt_struct):
+    """read and unpack a struct.Struct, raise _FrameError if the file is too short"""
+    buffer = f.read(fmt_struct.size)
+    if len(buffer) != fmt_struct.size:
+        raise _FrameError("unexpected end of file at byte %d" % (f.tell()))
+    return fmt_struct.unpack(buffer)
+
+
+def _validate_file(f, report):
+    errors = report['errors']
+    file_size = report['file_size']
+
+    if file_size < FILE_HEADER_REAL_SIZE:
+        errors.append("the file is smaller than the file header (%d bytes)" % file_size)
+        return
+
+    header = f.read(FILE_HEADER_REAL_SIZE)
+    if header[:4] != MDT_MAGIC:
+        errors.append("warning: unknown magic number %s" % header[:4].hex())
+
+    mdt_file_size = struct.unpack_from('<I', header, 4)[0]
+    report['nb_frame'] = struct.unpack_from('<H', header, 12)[0] + 1
+
+    if mdt_file_size + FILE_HEADER_REAL_SIZE > file_size:
+        errors.append("the file is truncated: %d bytes announced, %d bytes found"
+                      % (mdt_file_size + FILE_HEADER_REAL_SIZE, file_size))
+    elif mdt_file_size + FILE_HEADER_REAL_SIZE < file_size:
+        errors.append("warning: %d bytes after the announced end of the file"
+                      % (file_size - mdt_file_size - FILE_HEADER_REAL_SIZE))
+
+    # the frame chain : each frame start at the end of the previous one
+    offset = FILE_HEADER_REAL_SIZE
+    for index in range(report['nb_frame']):
+        frame_report = {
+            'index'  : index,
+            'offset' : offset,
+            'size'   : 0,
+            'type'   : None,
+            'status' : "ok",
+            'errors' : [],
+        }
+        report['frames'].append(frame_report)
+
+        chain_ok = _validate_frame(f, file_size, frame_report)
+        frame_report['status'] = _status(frame_report['errors'])
+        if not chain_ok:
+            errors.append("the frame chain is broken at frame %d, %d frame(s) not checked"
+                          % (index, report['nb_frame'] - index - 1))
+            return
+
+        offset += frame_report['size']
+
+    if offset < file_size:
+        errors.append("warning: %d bytes after the last frame" % (file_size - offset))
+
+
+def _validate_frame(f, file_size, frame_report):
+    """check one frame, return False if the position of the next frame cannot be trusted"""
+    errors = frame_report['errors']
+    offset = frame_report['offset']
+
+    if offset + ByteSize.FRAME_HEADER_SIZE > file_size:
+        errors.append("the frame header is beyond the end of the file")
+        return False
+
+    f.seek(offset)
+    size, frame_type = struct.unpack('<IH', f.read(6))
+    frame_report['size'] = size
+    frame_report['type'] = frame_type
+
+    if size < ByteSize.FRAME_HEADER_SIZE:
+        errors.append("the frame size (%d) is smaller than the frame header" % size)
+        return False
+
+    if offset + size > file_size:
+        errors.append("the frame is truncated: ends at byte %d, the file has %d bytes"
+                      % (offset + size, file_size))
+        return False
+
+    end = offset + size
+    f.seek(offset + ByteSize.FRAME_HEADER_SIZE)
+
+    try:
+        if frame_type == MDTFrameType.MDT_FRAME_TEXT:
+            _validate_text_frame(f, end, errors)
+        elif frame_type == MDTFrameType.MDT_FRAME_MDA:
+            _validate_mda_frame(f, end, errors)
+        elif frame_type not in MDTFrameType.__members__.values():
+            errors.append("warning: unknown frame type %d" % frame_type)
+    except _FrameError as e:
+        errors.append(str(e))
+
+    return True
+
+
+def _validate_text_frame(f, end, errors):
+    """see MDTFile._extract_text_frame, the same checks are done on the text, the title and the XML"""
+    size = end - f.tell()
+    buffer = f.read(size)
+    if len(buffer) != size:
+        raise _FrameError("unexpected end of file at byte %d" % (f.tell()))
+    if size < 4:
+        raise _FrameError("the frame is too small for the text length")
+
+    data_len, = struct.unpack_from('<I', buffer, 0)
+
+    # 4 bytes for the length, 14 0x00 bytes, the text, the title length and 3 0x00
+    position = 18 + data_len + 4
+    if position > size:
+        raise _FrameError("the text (%d bytes) is longer than the frame" % data_len)
+
+    # no title length byte for the default title (see MDTFile._extract_text_frame)
+    title_len = buffer[position - 4]
+    if title_len == 0 and any(buffer[position - 3:position]):
+        title_len = 11
+
+    position += title_len
+    if position > size:
+        raise _FrameError("the title (%d bytes) goes beyond the end of the frame" % title_len)
+    if position + 2 > size:
+        raise _FrameError("the XML length goes beyond the end of the frame")
+
+    xml_len, = struct.unpack_from('<H', buffer, position)
+    if position + 4 + xml_len > size:
+        raise _FrameError("the XML (%d bytes) goes beyond the end of the frame" % xml_len)
+
+
+def _validate_mda_frame(f, end, errors):
+    """see MDTFile._extract_mda_frame and MDTFile._extract_mda_calibration"""
+    start = f.tell()
+
+    (head_size, total_size, _, title_size, xml_size, view_info_size, spec_size,
+     source_info_size, var_size, _) = _read(f, MDA_HEADER_STRUCT)
+
+    if total_size < head_size:
+        raise _FrameError("the MDA total size (%d) is smaller than the MDA header size (%d)"
+                          % (total_size, head_size))
+    if start + total_size > end:
+        errors.append("the MDA total size (%d) goes beyond the end of the frame" % total_size)
+
+    var_position = start + head_size + title_size + xml_size + spec_size + view_info_size + source_info_size
+    if var_position + 8 > end:
+        raise _FrameError("the MDA info blocks go beyond the end of the frame")
+
+    f.seek(var_position)
+    var_size_bis, struct_size = _read(f, struct.Struct('<II'))
+    if var_size_bis != var_size:
+        raise _FrameError("the MDA variable size is %d in the header and %d before the data"
+                          % (var_size, var_size_bis))
+    if var_position + 4 + var_size > end:
+        errors.append("the MDA variable size (%d) goes beyond the end of the frame" % var_size)
+
+    struct_position = f.tell()
+    data_size, nb_dimensions, nb_mesurands = _read(f, struct.Struct('<Q4xII'))
+
+    f.seek(struct_position + struct_size)
+
+    calibrations = []
+    for i in range(nb_dimensions + nb_mesurands):
+        calibrations.append(_validate_calibration(f, end, i))
+
+    if nb_dimensions == 2 and nb_mesurands == 1:
+        nb_points = 1
+        for axis in calibrations[:2]:
+            nb_points *= axis['max_index'] - axis['min_index'] + 1
+        values_sizes = [calibrations[2]['item_size']]
+
+    elif (nb_dimensions == 1 and nb_mesurands == 1) or (nb_dimensions == 0 and nb_mesurands == 2):
+        nb_points = calibrations[0]['max_index'] - calibrations[0]['min_index']
+        if nb_points == 0:
+            nb_points = data_size
+        # for the old-like curve, only the y are in the data
+        values_sizes = [cal['item_size'] for cal in calibrations[nb_dimensions:]]
+
+    else:
+        errors.append("warning: %d dimension(s) and %d mesurand(s) are not supported by the reader"
+                      % (nb_dimensions, nb_mesurands))
+        return
+
+    if None in values_sizes:
+        errors.append("warning: data type not supported by the reader")
+        return
+
+    data_bytes = nb_points * sum(values_sizes)
+    if f.tell() + data_bytes > end:
+        errors.append("the data are truncated: %d bytes expected, %d bytes available"
+                      % (data_bytes, end - f.tell()))
+
+
+def _validate_calibration(f, end, num):
+    """check the calibration starting at the current position, let the file at the next one"""
+    start = f.tell()
+
+    (total_len, struct_len, name_len, comment_len, unit_len, _, _, _, _,
+     min_index, max_index, data_type, author_len) = _read(f, CALIBRATION_STRUCT)
+
+    if start + total_len > end:
+        raise _FrameError("the calibration %d goes beyond the end of the frame" % num)
+    if 8 + struct_len + comment_len + unit_len + author_len > total_len:
+        raise _FrameError("the calibration %d strings are longer than the calibration" % num)
+    if CALIBRATION_STRUCT.size + name_len > 8 + struct_len:
+        raise _FrameError("the calibration %d name is longer than the calibration structure" % num)
+    if max_index < min_index:
+        raise _FrameError("the calibration %d max index is smaller than the min index" % num)
+
+    f.seek(start + total_len)
+
+    try:
+        item_size = MDA_DATA_TYPE_SIZE[MDADataType(data_type)]
+    except ValueError:
+        item_size = None
+
+    return {'min_index': min_index, 'max_index': max_index, 'item_size': item_size}
+
+
+def _expand_paths(paths):
+    """the files, and the *.mdt files of the directories (recursively)"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(".mdt"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the structure of mdt files without decoding the data.")
+    parser.add_argument("paths", nargs="+", help="mdt files or directories")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="number of processes (default 1)")
+    args = parser.parse_args()
+
+    invalid = False
+    for report in validate_many(list(_expand_paths(args.paths)), args.jobs):
+        print(json.dumps(report))
+        invalid = invalid or report['status'] == "error"
+
+    sys.exit(1 if invalid else 0)
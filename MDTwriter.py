@@ -0,0 +1,360 @@
+"""
+    Writer of mdt files.
+
+    The layout is the one read by MDTFile (file header, frame header, text frame, MDA frame with
+    its calibrations). The frames are written one after the other directly in the file, the file
+    header is completed when the writer is closed, so the file object has to be seekable.
+
+    The data are written with one bulk write of the numpy buffer (or one write per chunk when the
+    data are given as an iterable of chunks), so a big frame can be streamed without building it
+    in memory :
+
+        with MDTWriter("out.mdt") as writer:
+            writer.write_frame(frame)                   # a MDTFrame (text, 2D or curve)
+            writer.write_mda_frame("Height", [x, y], [z], chunks)
+
+    MDTFile.save(path) writes all the frames of a MDTFile.
+"""
+import binascii
+import struct
+import time
+
+import numpy as np
+
+from MDTdeclaration import *
+
+# numpy type of the MDADataType, the other types can only be written from raw bytes
+MDA_NUMPY_DTYPE = {
+    MDADataType.MDA_DATA_INT8    : np.dtype('<i1'),
+    MDADataType.MDA_DATA_UINT8   : np.dtype('<u1'),
+    MDADataType.MDA_DATA_INT16   : np.dtype('<i2'),
+    MDADataType.MDA_DATA_UINT16  : np.dtype('<u2'),
+    MDADataType.MDA_DATA_INT32   : np.dtype('<i4'),
+    MDADataType.MDA_DATA_UINT32  : np.dtype('<u4'),
+    MDADataType.MDA_DATA_INT64   : np.dtype('<i8'),
+    MDADataType.MDA_DATA_UINT64  : np.dtype('<u8'),
+    MDADataType.MDA_DATA_FLOAT32 : np.dtype('<f4'),
+    MDADataType.MDA_DATA_FLOAT64 : np.dtype('<f8'),
+}
+
+# size of the MDA header written (see MDTFile._extract_mda_frame)
+MDA_HEADER_SIZE = 76
+
+
+def make_calibration(name, unit, data_type, min_index, max_index, scale=1.0, bias=0.0,
+                     comment="", author="", accuracy=0.0, unit_code=0):
+    """return a calibration dictionary, with the same keys than MDTFile._extract_mda_calibration"""
+    return {
+        'unit_code' : unit_code,
+        'accuracy'  : accuracy,
+        'bias'      : bias,
+        'scale'     : scale,
+        'min_index' : min_index,
+        'max_index' : max_index,
+        'data_type' : int(data_type),
+        'name'      : name,
+        'comment'   : comment,
+        'unit'      : unit,
+        'author'    : author,
+    }
+
+
+def _pack_calibration(calibration):
+    """the calibration block, see MDTFile._extract_mda_calibration"""
+    name    = calibration['name'].encode('latin-1')
+    comment = calibration['comment'].encode('latin-1')
+    unit    = calibration['unit'].encode('latin-1')
+    author  = calibration['author'].encode('latin-1')
+
+    structure = struct.pack('<IIIQd8xddQQiI36x', len(name), len(comment), len(unit),
+                            calibration['unit_code'], calibration['accuracy'],
+                            calibration['bias'], calibration['scale'],
+                            calibration['min_index'], calibration['max_index'],
+                            calibration['data_type'], len(author)) + name
+
+    block = struct.pack('<I', len(structure)) + structure + comment + unit + author
+    return struct.pack('<I', 4 + len(block)) + block
+
+
+def _pack_guids(guids):
+    """the 32 bytes of the guids, from MDTFrame.guids (zeros if they cannot be read back)"""
+    try:
+        # MDTFrame.guids are the str() of the hexlify bytes, i.e. "b'0a1b...'"
+        packed = b''.join(binascii.unhexlify(guid[2:-1]) for guid in guids)
+    except (TypeError, ValueError, binascii.Error):
+        packed = b''
+    return packed if len(packed) == 32 else bytes(32)
+
+
+class MDTWriter(object):
+    """write a mdt file frame by frame, file can be a path or a binary file object (seekable)"""
+
+    def __init__(self, file):
+        if isinstance(file, str):
+            self._file = open(file, 'wb')
+            self._own_file = True
+        else:
+            self._file = file
+            self._own_file = False
+
+        self._start = self._file.tell()
+        self.nb_frames = 0
+        self._body_size = 0
+
+        # the header is completed by close()
+        self._file.write(bytes(ByteSize.FILE_HEADER_SIZE + 1))
+
+    def write_frame(self, frame, data_type=None, origin=None):
+        """
+            write a MDTFrame : a text frame, or a MDA frame with 2D data or a curve.
+
+            The data are encoded back with the calibration of the mesurands (raw = (data - bias) / scale),
+            in the data type of the calibration or in data_type if given (a MDADataType). An integer type
+            cannot hold values out of its range (processed data for example), ValueError is raised, use
+            a float data_type (MDA_DATA_FLOAT32 or MDA_DATA_FLOAT64) to write them.
+
+            The number of points of the dimensions is taken from the shape of the data, so a cropped frame
+            can be written. The bias of the dimensions (the position of the first point) is kept, give
+            origin, the index of the first point of the crop in the original frame for each dimension
+            ((ix, iy) for a 2D frame, (ix,) for an old-like curve), to shift it.
+        """
+        if frame.type == MDTFrameType.MDT_FRAME_TEXT:
+            self.write_text_frame(frame.data or "", frame.title, frame.metadata,
+                                  _frame_date(frame), frame.version)
+        elif frame.type == MDTFrameType.MDT_FRAME_MDA and isinstance(frame.data, np.ndarray):
+            dimensions, mesurands, data = _encode_mda_data(frame, data_type, origin)
+            self.write_mda_frame(frame.title, dimensions, mesurands, data, frame.metadata,
+                                 _frame_date(frame), frame.version, _pack_guids(frame.guids))
+        else:
+            raise ValueError("The frame %r (type %s) cannot be written" % (frame.title, frame.type))
+
+    def write_text_frame(self, text, title="", metadata="", date=None, version=(1, 0)):
+        """write a text frame, see MDTFile._extract_text_frame for the layout"""
+        text = text.encode('utf-8')
+        title = title.encode('utf-8')
+        xml = metadata.encode('utf-16') if metadata else b''
+
+        if len(title) > 0xFF:
+            raise ValueError("The title of a text frame is limited to 255 bytes")
+        if len(xml) > 0xFFFF:
+            raise ValueError("The metadata of a text frame are limited to 65535 bytes (in UTF-16)")
+
+        payload = b''.join([
+            struct.pack('<I14x', len(text)), text,
+            struct.pack('<B3x', len(title)), title,
+            struct.pack('<H2x', len(xml)), xml,
+        ])
+
+        self._write_frame_header(len(payload), MDTFrameType.MDT_FRAME_TEXT, date, version)
+        self._file.write(payload)
+
+    def write_mda_frame(self, title, dimensions, mesurands, data, metadata="", date=None,
+                        version=(1, 0), guids=bytes(32)):
+        """
+            write a MDA frame with the calibrations dimensions and mesurands (lists of dictionaries,
+            see make_calibration) and the raw data.
+
+            data is a numpy array, bytes, or an iterable of them (chunks, written one by one). The values
+            must be raw values, already in the data type and the order of the calibrations (see
+            MDTFile._extract_mda_2d_data and MDTFile._extract_mda_curve).
+        """
+        title = title.encode('utf-8')
+        xml = metadata.encode('utf-16') if metadata else b''
+
+        nb_points, data_bytes = _data_layout(dimensions, mesurands)
+
+        calibrations = b''.join(_pack_calibration(cal) for cal in list(dimensions) + list(mesurands))
+        var_struct = struct.pack('<Q4xII', nb_points, len(dimensions), len(mesurands))
+        var_head = struct.pack('<I', len(var_struct)) + var_struct + calibrations
+        var_size = len(var_head) + data_bytes
+
+        mda_size = MDA_HEADER_SIZE + len(title) + len(xml) + 4 + var_size
+
+        self._write_frame_header(mda_size, MDTFrameType.MDT_FRAME_MDA, date, version)
+
+        self._file.write(struct.pack('<II', MDA_HEADER_SIZE, mda_size))
+        self._file.write(guids)
+        self._file.write(struct.pack('<4x6I4xI', len(title), len(xml), 0, 0, 0, var_size, nb_points))
+        self._file.write(title)
+        self._file.write(xml)
+        self._file.write(struct.pack('<I', var_size))
+        self._file.write(var_head)
+
+        if isinstance(data, (np.ndarray, bytes, bytearray, memoryview)):
+            data = [data]
+
+        written = 0
+        for chunk in data:
+            if isinstance(chunk, np.ndarray):
+                # a byte view of the buffer (works for the structured arrays too), no copy
+                chunk = np.ascontiguousarray(chunk).reshape(-1).view(np.uint8)
+                self._file.write(chunk.data)
+                written += chunk.nbytes
+            else:
+                self._file.write(chunk)
+                written += len(chunk)
+
+        if written != data_bytes:
+            raise ValueError("The frame %r needs %d bytes of data, %d were given"
+                             % (title.decode('utf-8'), data_bytes, written))
+
+    def close(self, complete=True):
+        """
+            complete the file header and close the file (if it was opened by the writer).
+            With complete=False the header is left empty (no magic number), so the file cannot be
+            taken for a valid mdt file.
+        """
+        if self._file is None:
+            return
+        if not complete:
+            if self._own_file:
+                self._file.close()
+            self._file = None
+            return
+
+        end = self._file.tell()
+        self._file.seek(self._start)
+        self._file.write(MDT_MAGIC)
+        self._file.write(struct.pack('<I4xH', self._body_size & 0xFFFFFFFF, max(self.nb_frames - 1, 0)))
+        self._file.seek(end)
+
+        if self._own_file:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # a file stopped by an error is not completed
+        self.close(complete=exc_type is None)
+
+    def _write_frame_header(self, payload_size, frame_type, date, version):
+        """the 22 bytes of the frame header, see MDTFile._extract_header"""
+        if date is None:
+            now = time.localtime()
+            date = (now.tm_year, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min, now.tm_sec)
+
+        size = ByteSize.FRAME_HEADER_SIZE + payload_size
+        if size > 0xFFFFFFFF:
+            raise ValueError("A frame is limited to 4 GB")
+
+        self._file.write(struct.pack('<IHBB6H2x', size, int(frame_type), version[0], version[1], *date))
+
+        self.nb_frames += 1
+        self._body_size += size
+
+
+def _frame_date(frame):
+    return frame.year, frame.month, frame.day, frame.hour, frame.min, frame.sec
+
+
+def _data_layout(dimensions, mesurands):
+    """the number of points and the size in bytes of the data of a MDA frame"""
+    def item_size(calibration):
+        return MDA_DATA_TYPE_SIZE[MDADataType(calibration['data_type'])]
+
+    if len(dimensions) == 2 and len(mesurands) == 1:
+        nb_points = 1
+        for axis in dimensions:
+            nb_points *= axis['max_index'] - axis['min_index'] + 1
+        return nb_points, nb_points * item_size(mesurands[0])
+
+    if (len(dimensions) == 1 and len(mesurands) == 1) or (len(dimensions) == 0 and len(mesurands) == 2):
+        x_axis = dimensions[0] if dimensions else mesurands[0]
+        nb_points = x_axis['max_index'] - x_axis['min_index']
+        # for the old-like curve only the y are in the data
+        return nb_points, nb_points * sum(item_size(cal) for cal in mesurands)
+
+    raise ValueError("%d dimension(s) and %d mesurand(s) are not supported"
+                     % (len(dimensions), len(mesurands)))
+
+
+def _encode(values, calibration, data_type, with_bias=True):
+    """
+        raw values of the calibration (the inverse of the decoding), return the new calibration
+        and the raw values as a numpy array
+    """
+    calibration = dict(calibration)
+    if data_type is not None:
+        calibration['data_type'] = int(data_type)
+        if MDA_NUMPY_DTYPE[MDADataType(data_type)].kind == 'f':
+            calibration['scale'] = 1.0
+            calibration['bias'] = 0.0
+
+    dtype = MDA_NUMPY_DTYPE.get(MDADataType(calibration['data_type']))
+    if dtype is None:
+        calibration['data_type'] = int(MDADataType.MDA_DATA_FLOAT64)
+        calibration['scale'] = 1.0
+        calibration['bias'] = 0.0
+        dtype = MDA_NUMPY_DTYPE[MDADataType.MDA_DATA_FLOAT64]
+
+    raw = np.asarray(values, dtype=float)
+    if with_bias and calibration['bias'] != 0.0:
+        raw = raw - calibration['bias']
+    if calibration['scale'] not in (0.0, 1.0):
+        raw = raw / calibration['scale']
+    if dtype.kind in 'iu':
+        raw = np.rint(raw)
+        _check_range(raw, dtype, calibration)
+
+    return calibration, raw.astype(dtype)
+
+
+def _check_range(raw, dtype, calibration):
+    """raise ValueError if the rounded raw values cannot be stored in the integer dtype"""
+    if raw.size == 0:
+        return
+
+    type_name = MDADataType(calibration['data_type']).name
+    if np.isnan(raw).any():
+        raise ValueError("The values of %r contain NaN, they cannot be stored in %s, use a float data_type"
+                         % (calibration['name'], type_name))
+
+    info = np.iinfo(dtype)
+    low, high = raw.min(), raw.max()
+    if low < info.min or high > info.max:
+        raise ValueError("The values of %r (raw values from %g to %g) cannot be stored in %s, use a float data_type"
+                         % (calibration['name'], low, high, type_name))
+
+
+def _shift_origin(dimensions, origin):
+    """the dimensions with the bias moved to the point origin (an index for each dimension)"""
+    if origin is None:
+        return dimensions
+    if len(origin) != len(dimensions):
+        raise ValueError("The origin %r needs one index per dimension (%d)" % (tuple(origin), len(dimensions)))
+
+    return [dict(axis, bias=axis['bias'] + index * axis['scale']) for axis, index in zip(dimensions, origin)]
+
+
+def _encode_mda_data(frame, data_type, origin=None):
+    """return the calibrations and the raw data of a 2D or curve MDTFrame"""
+    data = frame.data
+
+    if frame.nb_dimensions == 2 and frame.nb_mesurands == 1:
+        dimensions = [dict(axis, min_index=0, max_index=n - 1)
+                      for axis, n in zip(_shift_origin(frame.dimensions, origin), data.shape)]
+        z_axis, raw = _encode(data, frame.mesurands[0], data_type)
+        return dimensions, [z_axis], raw
+
+    if frame.nb_dimensions == 1 and frame.nb_mesurands == 1:
+        # old-like : only y is stored (without bias), x is regenerated from the dimension
+        x_axis = dict(_shift_origin(frame.dimensions, origin)[0], min_index=0, max_index=data.shape[1])
+        y_axis, raw = _encode(data[1], frame.mesurands[0], data_type, with_bias=False)
+        return [x_axis], [y_axis], raw
+
+    if frame.nb_dimensions == 0 and frame.nb_mesurands == 2:
+        # new-like : x and y interleaved, each with its own type (without bias), there is no dimension
+        _shift_origin([], origin)
+        x_axis, x_raw = _encode(data[0], frame.mesurands[0], data_type, with_bias=False)
+        y_axis, y_raw = _encode(data[1], frame.mesurands[1], data_type, with_bias=False)
+        x_axis.update(min_index=0, max_index=data.shape[1])
+
+        raw = np.empty(data.shape[1], dtype=[('x', x_raw.dtype), ('y', y_raw.dtype)])
+        raw['x'] = x_raw
+        raw['y'] = y_raw
+        return [], [x_axis, y_axis], raw
+
+    raise ValueError("The frame %r (%d dimension(s), %d mesurand(s)) cannot be written"
+                     % (frame.title, frame.nb_dimensions, frame.nb_mesurands))